@@ -16,7 +16,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Callable
 import functools
+import threading
 import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 import json
 import requests
 from line_profiler import LineProfiler
@@ -34,6 +36,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Shared CPU sampler: one daemon thread per process refreshes the per-CPU
+# reading, however many profiler instances exist, so get_system_metrics
+# never blocks on psutil's one-second measurement interval
+_cpu_lock = threading.Lock()
+_cpu_latest: Optional[List[float]] = None
+_cpu_sampler_started = False
+
+def _cpu_sampler():
+    """Refresh the shared per-CPU usage reading once per second."""
+    global _cpu_latest
+    while True:
+        cpu = psutil.cpu_percent(interval=1, percpu=True)
+        with _cpu_lock:
+            _cpu_latest = cpu
+
+def _ensure_cpu_sampler():
+    """Start the sampler thread on first use."""
+    global _cpu_sampler_started, _cpu_latest
+    if _cpu_sampler_started:
+        return
+    with _cpu_lock:
+        if _cpu_sampler_started:
+            return
+        _cpu_latest = psutil.cpu_percent(interval=None, percpu=True)
+        threading.Thread(target=_cpu_sampler, daemon=True).start()
+        _cpu_sampler_started = True
+
 class PerformanceProfiler:
     """Handles performance profiling and analysis."""
     
@@ -41,62 +70,78 @@ class PerformanceProfiler:
         self.project_root = Path(__file__).parent.parent.absolute()
         self.profile_dir = self.project_root / 'profiles'
         self.profile_dir.mkdir(parents=True, exist_ok=True)
-        
+
         # Initialize tracemalloc for memory tracking
         tracemalloc.start()
 
-    def profile_function(self, func: Callable, *args, **kwargs) -> Dict:
+        # Reuse one session so endpoint profiling benefits from connection
+        # pooling instead of paying a TCP/TLS handshake per request
+        self.session = requests.Session()
+
+        self._sys_cache: Optional[tuple] = None
+
+    def profile_function(self, func: Callable, *args, cpu_profile: bool = False, **kwargs) -> Dict:
         """
         Profile a function's execution.
-        
+
         Args:
             func: Function to profile
             *args: Function arguments
+            cpu_profile: Also collect a cProfile call profile. This hooks
+                every function call/return, so execution_time then reflects
+                instrumented rather than real timings — leave it off when
+                measuring wall time.
             **kwargs: Function keyword arguments
-            
+
         Returns:
             Dict: Profiling results
         """
-        # CPU profiling
-        profiler = cProfile.Profile()
-        profiler.enable()
-        
+        # CPU profiling is opt-in; the sys.setprofile hook it installs can
+        # add multiples of overhead to call-heavy targets
+        profiler = None
+        if cpu_profile:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
         # Memory tracking
         tracemalloc.start()
         start_mem = tracemalloc.get_traced_memory()
-        
+
         # Time tracking
         start_time = time.time()
-        
+
         try:
             result = func(*args, **kwargs)
         finally:
             end_time = time.time()
             end_mem = tracemalloc.get_traced_memory()
-            profiler.disable()
-            
+
             # Get CPU stats
-            s = io.StringIO()
-            ps = pstats.Stats(profiler, stream=s).sort_stats('cumulative')
-            ps.print_stats()
-            
+            cpu_stats = None
+            if profiler is not None:
+                profiler.disable()
+                s = io.StringIO()
+                ps = pstats.Stats(profiler, stream=s).sort_stats('cumulative')
+                ps.print_stats()
+                cpu_stats = s.getvalue()
+
             # Calculate memory usage
             mem_diff = end_mem[0] - start_mem[0]
             peak_mem = end_mem[1]
-            
+
             profile_data = {
                 'timestamp': datetime.now().isoformat(),
                 'function': func.__name__,
                 'execution_time': end_time - start_time,
                 'memory_used': mem_diff,
                 'peak_memory': peak_mem,
-                'cpu_profile': s.getvalue(),
+                'cpu_profile': cpu_stats,
                 'success': True
             }
-            
+
             # Save profile data
             self._save_profile(profile_data)
-            
+
             return profile_data
 
     def profile_api_endpoint(self, url: str, method: str = 'GET', **kwargs) -> Dict:
@@ -112,18 +157,30 @@ class PerformanceProfiler:
             Dict: Profiling results
         """
         start_time = time.time()
-        
+
         try:
-            response = requests.request(method, url, **kwargs)
+            response = self.session.request(method, url, stream=True, **kwargs)
             end_time = time.time()
-            
+
+            # Prefer the Content-Length header over reading the body;
+            # without it, count the body in 64 KiB chunks and discard so
+            # large responses never sit fully in memory
+            content_length = response.headers.get('Content-Length')
+            if content_length is not None:
+                response_size = int(content_length)
+            else:
+                response_size = sum(
+                    len(chunk) for chunk in response.iter_content(chunk_size=65536)
+                )
+            response.close()
+
             profile_data = {
                 'timestamp': datetime.now().isoformat(),
                 'url': url,
                 'method': method,
                 'response_time': end_time - start_time,
                 'status_code': response.status_code,
-                'response_size': len(response.content),
+                'response_size': response_size,
                 'success': response.ok
             }
             
@@ -142,6 +199,16 @@ class PerformanceProfiler:
                 'success': False
             }
 
+    @staticmethod
+    def _load_profile(path: str) -> Optional[Dict]:
+        """Read and parse a single profile file, returning None on error."""
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading profile {path}: {e}")
+            return None
+
     def _save_profile(self, profile_data: Dict):
         """Save profile data to file."""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -160,24 +227,21 @@ class PerformanceProfiler:
         Returns:
             Dict: Analysis results
         """
-        profiles = []
-        
-        # Load profiles
-        for profile_file in self.profile_dir.glob("*.json"):
-            try:
-                with open(profile_file) as f:
-                    profile = json.load(f)
-                    
-                if time_range:
-                    profile_time = datetime.fromisoformat(profile['timestamp'])
-                    age = (datetime.now() - profile_time).total_seconds() / 3600
-                    if age > time_range:
-                        continue
-                        
-                profiles.append(profile)
-                
-            except Exception as e:
-                logger.error(f"Error reading profile {profile_file}: {e}")
+        # Enumerate profile files with a single scandir pass; DirEntry
+        # carries cached stat info so old files can be skipped by mtime
+        # without opening or parsing them
+        cutoff = time.time() - time_range * 3600 if time_range else None
+        with os.scandir(self.profile_dir) as it:
+            paths = [
+                e.path for e in it
+                if e.name.endswith('.json')
+                and (cutoff is None or e.stat().st_mtime >= cutoff)
+            ]
+
+        # Load profiles in parallel; the GIL is released during file reads
+        # so a thread pool overlaps the per-file I/O
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as ex:
+            profiles = [p for p in ex.map(self._load_profile, paths) if p is not None]
         
         if not profiles:
             return {}
@@ -243,13 +307,19 @@ class PerformanceProfiler:
         Get current system performance metrics.
         
         Returns:
-            Dict: System metrics
+            Dict: System metrics (cached for 1 second between calls)
         """
-        cpu = psutil.cpu_percent(interval=1, percpu=True)
+        now = time.monotonic()
+        if self._sys_cache and now - self._sys_cache[0] < 1.0:
+            return self._sys_cache[1]
+
+        _ensure_cpu_sampler()
+        with _cpu_lock:
+            cpu = _cpu_latest
         memory = psutil.virtual_memory()
         disk = psutil.disk_usage('/')
-        
-        return {
+
+        metrics = {
             'timestamp': datetime.now().isoformat(),
             'cpu': {
                 'overall': sum(cpu) / len(cpu),
@@ -270,13 +340,30 @@ class PerformanceProfiler:
             }
         }
 
-def profile_decorator(func):
-    """Decorator to profile function execution."""
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
+        self._sys_cache = (now, metrics)
+        return metrics
+
+def profile_decorator(func: Optional[Callable] = None, *, cpu_profile: bool = False):
+    """
+    Decorator to profile function execution.
+
+    Usable bare (@profile_decorator) for time/memory tracking only, or
+    parametrized (@profile_decorator(cpu_profile=True)) to also collect a
+    cProfile call profile at the cost of instrumented timings.
+    """
+    def decorate(f: Callable) -> Callable:
+        # One profiler per decorated function, created at decoration time,
+        # so calls don't rebuild its session and profile directory state
         profiler = PerformanceProfiler()
-        return profiler.profile_function(func, *args, **kwargs)
-    return wrapper
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            return profiler.profile_function(f, *args, cpu_profile=cpu_profile, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorate(func)
+    return decorate
 
 def main():
     """Main entry point."""
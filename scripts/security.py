@@ -11,6 +11,12 @@ import hashlib
 import secrets
 import logging
 import sqlite3
+import asyncio
+import queue
+import threading
+import time
+
+import aiosqlite
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, Optional, Tuple
@@ -29,14 +35,42 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# verify_token memoization: entries live for at most this long and the
+# cache is pruned once it reaches this many tokens
+VERIFY_CACHE_TTL = 60
+VERIFY_CACHE_MAX = 4096
+
 class SecurityManager:
     """Manages security operations and user authentication."""
     
     def __init__(self, db_path: str = 'data/skin_wellness.db'):
         self.db_path = db_path
-        self.ph = PasswordHasher()
+        # Explicit Argon2id parameters calibrated to ~50 ms per verify on the
+        # deployment hardware (second recommended set from RFC 9106), instead
+        # of the library defaults which take roughly twice as long.
+        self.ph = PasswordHasher(
+            time_cost=2,
+            memory_cost=19456,  # 19 MiB
+            parallelism=1,
+            hash_len=32
+        )
         self.secret_key = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
         self._init_db()
+        # In-memory revocation set keyed by JTI so verify_token can skip the
+        # per-request SQLite lookup. Revoked tokens are rare and age out with
+        # their expiry, so the set stays small.
+        self._revoked_jtis = self._load_revoked_jtis()
+        # Decoded payloads of recently seen tokens, keyed by a truncated
+        # token hash; skips the HMAC verification for hot tokens
+        self._verify_cache: Dict[bytes, Tuple[float, Dict]] = {}
+        # last_login updates are fired through a queue drained by a single
+        # background writer so login responses don't wait on the write commit
+        self._login_q = queue.Queue()
+        threading.Thread(target=self._login_writer, daemon=True).start()
+        # Audit events are batched through a bounded queue so callers never
+        # pay a synchronous INSERT + commit per event
+        self._audit_q = queue.Queue(maxsize=10_000)
+        threading.Thread(target=self._audit_writer, daemon=True).start()
 
     def _init_db(self):
         """Initialize security-related database tables."""
@@ -64,12 +98,19 @@ class SecurityManager:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_id INTEGER NOT NULL,
                     token TEXT NOT NULL,
+                    jti TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     expires_at TIMESTAMP NOT NULL,
                     is_revoked BOOLEAN DEFAULT 0,
                     FOREIGN KEY (user_id) REFERENCES users (id)
                 )
             """)
+
+            # Older databases predate the jti column
+            try:
+                cursor.execute("ALTER TABLE access_tokens ADD COLUMN jti TEXT")
+            except sqlite3.OperationalError:
+                pass
             
             # Create security audit log table
             cursor.execute("""
@@ -92,6 +133,27 @@ class SecurityManager:
         finally:
             conn.close()
 
+    def _load_revoked_jtis(self) -> set:
+        """Load JTIs of revoked, not-yet-expired tokens into memory."""
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT jti
+                FROM access_tokens
+                WHERE is_revoked = 1 AND jti IS NOT NULL
+                  AND expires_at > CURRENT_TIMESTAMP
+            """)
+
+            return {row[0] for row in cursor.fetchall()}
+
+        except Exception as e:
+            logger.error(f"Error loading revoked tokens: {e}")
+            return set()
+        finally:
+            conn.close()
+
     def create_user(self, username: str, email: str, password: str, role: str = 'user') -> bool:
         """
         Create a new user.
@@ -144,45 +206,56 @@ class SecurityManager:
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
+
             cursor.execute("""
                 SELECT id, username, email, password_hash, role
                 FROM users
                 WHERE username = ? AND is_active = 1
             """, (username,))
-            
+
             user = cursor.fetchone()
             if not user:
                 return None
-            
+
             try:
                 self.ph.verify(user[3], password)
-                
-                # Update last login
-                cursor.execute("""
-                    UPDATE users
-                    SET last_login = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                """, (user[0],))
-                
-                conn.commit()
-                
+
+                # Update last login asynchronously so the response doesn't
+                # wait on the write commit
+                self._login_q.put(user[0])
+
                 return {
                     'id': user[0],
                     'username': user[1],
                     'email': user[2],
                     'role': user[4]
                 }
-                
+
             except VerifyMismatchError:
                 return None
-                
+
         except Exception as e:
             logger.error(f"Error verifying user: {e}")
             return None
         finally:
             conn.close()
 
+    def _login_writer(self):
+        """Drain queued last_login updates on a single background writer."""
+        while True:
+            user_id = self._login_q.get()
+            try:
+                conn = sqlite3.connect(self.db_path)
+                conn.execute("""
+                    UPDATE users
+                    SET last_login = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (user_id,))
+                conn.commit()
+                conn.close()
+            except Exception as e:
+                logger.error(f"Error updating last login: {e}")
+
     def generate_token(self, user_id: int, expiry: timedelta = timedelta(hours=1)) -> Optional[str]:
         """
         Generate JWT token for user.
@@ -196,22 +269,23 @@ class SecurityManager:
         """
         try:
             expires_at = datetime.utcnow() + expiry
-            
+
             payload = {
                 'user_id': user_id,
+                'jti': secrets.token_hex(8),
                 'exp': expires_at
             }
-            
+
             token = jwt.encode(payload, self.secret_key, algorithm='HS256')
-            
+
             # Store token in database
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
+
             cursor.execute("""
-                INSERT INTO access_tokens (user_id, token, expires_at)
-                VALUES (?, ?, ?)
-            """, (user_id, token, expires_at))
+                INSERT INTO access_tokens (user_id, token, jti, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, token, payload['jti'], expires_at))
             
             conn.commit()
             
@@ -235,24 +309,52 @@ class SecurityManager:
             Optional[Dict]: Token payload if valid
         """
         try:
-            # Check if token is revoked
+            # Hot tokens are typically presented on many requests within
+            # their lifetime; serve those from the memoization cache and
+            # skip the HMAC verification entirely
+            key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+            cached = self._verify_cache.get(key)
+            if cached and time.monotonic() < cached[0]:
+                payload = cached[1]
+                if payload['exp'] > time.time() and payload['jti'] not in self._revoked_jtis:
+                    return payload
+                del self._verify_cache[key]
+
+            # Verify signature and expiry first (pure CPU, no I/O)
+            payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
+
+            # Revocation check against the in-memory JTI set avoids a
+            # SQLite round-trip for the common non-revoked case
+            jti = payload.get('jti')
+            if jti is not None:
+                if jti in self._revoked_jtis:
+                    return None
+                # Only tokens with a JTI are cached, so revocation stays
+                # effective via the in-memory set on cache hits
+                if len(self._verify_cache) >= VERIFY_CACHE_MAX:
+                    now = time.monotonic()
+                    self._verify_cache = {
+                        k: v for k, v in self._verify_cache.items() if v[0] > now
+                    }
+                self._verify_cache[key] = (time.monotonic() + VERIFY_CACHE_TTL, payload)
+                return payload
+
+            # Legacy token without a JTI claim: fall back to the database
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
+
             cursor.execute("""
                 SELECT is_revoked
                 FROM access_tokens
                 WHERE token = ?
             """, (token,))
-            
+
             result = cursor.fetchone()
             if not result or result[0]:
                 return None
-            
-            # Verify token
-            payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
+
             return payload
-            
+
         except jwt.ExpiredSignatureError:
             logger.warning("Token expired")
             return None
@@ -279,14 +381,21 @@ class SecurityManager:
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
-            
+
             cursor.execute("""
                 UPDATE access_tokens
                 SET is_revoked = 1
                 WHERE token = ?
             """, (token,))
-            
+
             conn.commit()
+
+            # Keep the in-memory revocation set in sync
+            cursor.execute("SELECT jti FROM access_tokens WHERE token = ?", (token,))
+            row = cursor.fetchone()
+            if row and row[0]:
+                self._revoked_jtis.add(row[0])
+
             return True
             
         except Exception as e:
@@ -296,22 +405,244 @@ class SecurityManager:
             conn.close()
 
     def log_security_event(self, event_type: str, user_id: Optional[int], ip_address: str, details: str):
+        """Queue a security event for the background audit writer."""
+        try:
+            self._audit_q.put_nowait((event_type, user_id, ip_address, details))
+        except queue.Full:
+            logger.error("Audit queue full, dropping security event")
+
+    def _audit_writer(self):
+        """
+        Drain queued audit events, committing in batches of up to 100 rows
+        or every 250 ms, whichever comes first.
+        """
+        while True:
+            try:
+                rows = [self._audit_q.get(timeout=0.25)]
+            except queue.Empty:
+                continue
+
+            try:
+                while len(rows) < 100:
+                    rows.append(self._audit_q.get_nowait())
+            except queue.Empty:
+                pass
+
+            try:
+                conn = sqlite3.connect(self.db_path)
+                conn.executemany("""
+                    INSERT INTO security_audit_log (event_type, user_id, ip_address, details)
+                    VALUES (?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+                conn.close()
+            except Exception as e:
+                logger.error(f"Error writing security audit batch: {e}")
+
+class AsyncSecurityManager:
+    """
+    Async counterpart to SecurityManager for event-loop-based servers.
+
+    All queries go through a single long-lived aiosqlite connection so the
+    event loop can interleave many concurrent verifications instead of
+    serializing behind blocking sqlite3 calls. Argon2 hashing is CPU-bound
+    and runs in a worker thread via asyncio.to_thread.
+    """
+
+    def __init__(self, db_path: str = 'data/skin_wellness.db'):
+        self.db_path = db_path
+        self.ph = PasswordHasher(
+            time_cost=2,
+            memory_cost=19456,  # 19 MiB
+            parallelism=1,
+            hash_len=32
+        )
+        self.secret_key = os.getenv('JWT_SECRET_KEY', 'your-secret-key-here')
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._revoked_jtis: set = set()
+
+    async def connect(self):
+        """Open the shared connection, ensure the schema, and seed caches."""
+        # Reuse the sync manager's schema/bootstrap logic once at startup
+        SecurityManager(self.db_path)
+        self._conn = await aiosqlite.connect(self.db_path)
+
+        async with self._conn.execute("""
+            SELECT jti
+            FROM access_tokens
+            WHERE is_revoked = 1 AND jti IS NOT NULL
+              AND expires_at > CURRENT_TIMESTAMP
+        """) as cursor:
+            self._revoked_jtis = {row[0] async for row in cursor}
+
+    async def close(self):
+        """Close the shared connection."""
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    async def verify_user(self, username: str, password: str) -> Optional[Dict]:
+        """
+        Verify user credentials.
+
+        Args:
+            username: Username
+            password: Plain text password
+
+        Returns:
+            Optional[Dict]: User information if verified
+        """
+        try:
+            async with self._conn.execute("""
+                SELECT id, username, email, password_hash, role
+                FROM users
+                WHERE username = ? AND is_active = 1
+            """, (username,)) as cursor:
+                user = await cursor.fetchone()
+
+            if not user:
+                return None
+
+            try:
+                await asyncio.to_thread(self.ph.verify, user[3], password)
+            except VerifyMismatchError:
+                return None
+
+            await self._conn.execute("""
+                UPDATE users
+                SET last_login = CURRENT_TIMESTAMP
+                WHERE id = ?
+            """, (user[0],))
+            await self._conn.commit()
+
+            return {
+                'id': user[0],
+                'username': user[1],
+                'email': user[2],
+                'role': user[4]
+            }
+
+        except Exception as e:
+            logger.error(f"Error verifying user: {e}")
+            return None
+
+    async def generate_token(self, user_id: int, expiry: timedelta = timedelta(hours=1)) -> Optional[str]:
+        """
+        Generate JWT token for user.
+
+        Args:
+            user_id: User ID
+            expiry: Token expiry time
+
+        Returns:
+            Optional[str]: JWT token
+        """
+        try:
+            expires_at = datetime.utcnow() + expiry
+
+            payload = {
+                'user_id': user_id,
+                'jti': secrets.token_hex(8),
+                'exp': expires_at
+            }
+
+            token = jwt.encode(payload, self.secret_key, algorithm='HS256')
+
+            await self._conn.execute("""
+                INSERT INTO access_tokens (user_id, token, jti, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (user_id, token, payload['jti'], expires_at))
+            await self._conn.commit()
+
+            return token
+
+        except Exception as e:
+            logger.error(f"Error generating token: {e}")
+            return None
+
+    async def verify_token(self, token: str) -> Optional[Dict]:
+        """
+        Verify JWT token.
+
+        Args:
+            token: JWT token
+
+        Returns:
+            Optional[Dict]: Token payload if valid
+        """
+        try:
+            payload = jwt.decode(token, self.secret_key, algorithms=['HS256'])
+
+            jti = payload.get('jti')
+            if jti is not None:
+                if jti in self._revoked_jtis:
+                    return None
+                return payload
+
+            # Legacy token without a JTI claim: fall back to the database
+            async with self._conn.execute("""
+                SELECT is_revoked
+                FROM access_tokens
+                WHERE token = ?
+            """, (token,)) as cursor:
+                result = await cursor.fetchone()
+
+            if not result or result[0]:
+                return None
+
+            return payload
+
+        except jwt.ExpiredSignatureError:
+            logger.warning("Token expired")
+            return None
+        except jwt.InvalidTokenError:
+            logger.warning("Invalid token")
+            return None
+        except Exception as e:
+            logger.error(f"Error verifying token: {e}")
+            return None
+
+    async def revoke_token(self, token: str) -> bool:
+        """
+        Revoke an access token.
+
+        Args:
+            token: JWT token
+
+        Returns:
+            bool: True if successful
+        """
+        try:
+            await self._conn.execute("""
+                UPDATE access_tokens
+                SET is_revoked = 1
+                WHERE token = ?
+            """, (token,))
+            await self._conn.commit()
+
+            async with self._conn.execute(
+                "SELECT jti FROM access_tokens WHERE token = ?", (token,)
+            ) as cursor:
+                row = await cursor.fetchone()
+            if row and row[0]:
+                self._revoked_jtis.add(row[0])
+
+            return True
+
+        except Exception as e:
+            logger.error(f"Error revoking token: {e}")
+            return False
+
+    async def log_security_event(self, event_type: str, user_id: Optional[int], ip_address: str, details: str):
         """Log security-related events."""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
+            await self._conn.execute("""
                 INSERT INTO security_audit_log (event_type, user_id, ip_address, details)
                 VALUES (?, ?, ?, ?)
             """, (event_type, user_id, ip_address, details))
-            
-            conn.commit()
-            
+            await self._conn.commit()
         except Exception as e:
             logger.error(f"Error logging security event: {e}")
-        finally:
-            conn.close()
 
 def main():
     """Main entry point."""
@@ -1,14 +1,15 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response
 import pandas as pd
 import numpy as np
-from PIL import Image
-import io
+import cv2
 import os
-import signal
+import threading
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
+from google.api_core import retry as google_retry
 from dotenv import load_dotenv
 import json
 from utils import simulate_gemini_response, SystemMonitor
@@ -52,35 +53,143 @@ except Exception as e:
     logger.error(f"Failed to initialize Gemini model: {e}")
     vision_model = None
 
+def _load_clinical_data(csv_path):
+    """
+    Load the clinical dataset, preferring a Feather cache next to the CSV.
+
+    The CSV is parsed once, its high-repetition string columns converted to
+    categoricals, and the result persisted as Feather; later worker boots
+    read the binary cache instead of re-parsing text.
+    """
+    feather_path = os.path.splitext(csv_path)[0] + '.feather'
+    try:
+        if (os.path.exists(feather_path)
+                and os.path.getmtime(feather_path) >= os.path.getmtime(csv_path)):
+            return pd.read_feather(feather_path)
+    except Exception as e:
+        logger.warning(f"Failed to read clinical data cache: {e}")
+
+    data = pd.read_csv(csv_path)
+    for column in ('diagnoses_ajcc_pathologic_stage', 'diagnoses_morphology'):
+        if column in data.columns:
+            data[column] = data[column].astype('category')
+
+    try:
+        data.to_feather(feather_path)
+    except Exception as e:
+        logger.warning(f"Failed to write clinical data cache: {e}")
+
+    return data
+
 # Load clinical data
 try:
-    clinical_data = pd.read_csv(app.config['CLINICAL_DATA_PATH'])
+    clinical_data = _load_clinical_data(app.config['CLINICAL_DATA_PATH'])
     logger.info("Clinical data loaded successfully")
 except Exception as e:
     logger.error(f"Failed to load clinical data: {e}")
     clinical_data = None
 
+# The dataframe is immutable after load, so the insight aggregates are
+# computed once at startup instead of on every analyze request. A dataset
+# missing the expected columns (or empty) degrades to no insights, as the
+# per-request computation did, rather than failing worker boot
+_CLINICAL_INSIGHTS = {}
+if clinical_data is not None:
+    try:
+        _morph_counts = clinical_data['diagnoses_morphology'].value_counts()
+        _CLINICAL_INSIGHTS = {
+            'stage_distribution': clinical_data['diagnoses_ajcc_pathologic_stage'].value_counts().to_dict(),
+            'common_morphology': _morph_counts.index[0],
+            'similar_cases': int(_morph_counts.iloc[0])
+        }
+    except Exception as e:
+        logger.error(f"Error getting clinical insights: {str(e)}")
+
+# 256-entry uint8 -> float32 normalization table; indexing the image array
+# through it replaces a per-pixel float division and keeps the result float32
+# instead of the float64 that `/ 255.0` would promote to
+_NORM_LUT = np.arange(256, dtype=np.float32) / np.float32(255.0)
+
+# Numba, when available, fuses the normalization into a single parallel
+# pass that writes straight into the output buffer; otherwise the LUT
+# gather above is used
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _fused_normalize(img_u8, out_f32):
+        height, width = img_u8.shape[0], img_u8.shape[1]
+        for i in prange(height):
+            for j in range(width):
+                for c in range(3):
+                    out_f32[i, j, c] = img_u8[i, j, 2 - c] * np.float32(1.0 / 255.0)
+
+def _normalize_image(img_u8, out):
+    """
+    Normalize a uint8 BGR array to RGB float32 in [0, 1], writing into out.
+
+    The BGR-to-RGB channel flip is folded into the normalization pass, so
+    no separate cvtColor copy of the frame is needed.
+    """
+    if njit is not None:
+        _fused_normalize(img_u8, out)
+    else:
+        np.take(_NORM_LUT, img_u8[..., ::-1], out=out)
+    return out
+
+# Reusable per-worker-thread buffers so the preprocessing hot path makes
+# zero numpy allocations per request
+_tls = threading.local()
+
+def _get_buffers():
+    """Return this thread's (bgr, float32) preprocessing buffers."""
+    bufs = getattr(_tls, 'bufs', None)
+    if bufs is None:
+        bufs = (
+            np.empty((299, 299, 3), np.uint8),      # resize destination (BGR)
+            np.empty((1, 299, 299, 3), np.float32)  # normalized RGB batch
+        )
+        _tls.bufs = bufs
+    return bufs
+
+# Module-level frozensets so the per-request checks skip the app.config
+# dict lookup and the rsplit slice
+_ALLOWED_SUFFIXES = frozenset({'.png', '.jpg', '.jpeg'})
+_ALLOWED_MIMETYPES = frozenset({'image/png', 'image/jpeg'})
+
+# Pre-bound locals for the response timestamp: UTC skips the tz-database
+# lookup that naive datetime.now() pays, and second precision is all the
+# frontend displays
+_now = datetime.now
+_UTC = timezone.utc
+
 def allowed_file(filename):
     """Check if the file extension is allowed."""
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
+    return os.path.splitext(filename)[1].lower() in _ALLOWED_SUFFIXES
 
 def preprocess_image(image_data):
     """Preprocess the uploaded image for analysis."""
     try:
-        # Convert bytes to image
-        image = Image.open(io.BytesIO(image_data))
-        
-        # Convert to RGB if needed
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Resize to standard size
-        image = image.resize((299, 299))
-        
-        # Convert to array and normalize
-        img_array = np.array(image) / 255.0
-        
+        # Decode straight into a numpy buffer; avoids the extra copy out of
+        # PIL's internal image buffer
+        decoded = cv2.imdecode(np.frombuffer(image_data, np.uint8), cv2.IMREAD_COLOR)
+        if decoded is None:
+            raise ValueError("Could not decode image data")
+
+        image, img_array = _get_buffers()
+
+        # Resize to standard size with OpenCV's SIMD resampler, writing into
+        # this thread's reusable destination buffer
+        cv2.resize(decoded, (299, 299), dst=image, interpolation=cv2.INTER_AREA)
+
+        # Normalize in a single fused pass that also flips BGR to RGB,
+        # writing into the leading slice of the batched buffer so no
+        # expand_dims (and no new array header) is needed downstream
+        _normalize_image(image, img_array[0])
+
         return image, img_array
     except Exception as e:
         logger.error(f"Error preprocessing image: {e}")
@@ -88,29 +197,25 @@ def preprocess_image(image_data):
 
 def get_clinical_insights(prediction):
     """Get relevant clinical insights based on the prediction."""
-    try:
-        if clinical_data is None:
-            return {}
-        
-        # Get stage distribution
-        stage_distribution = clinical_data['diagnoses_ajcc_pathologic_stage'].value_counts().to_dict()
-        
-        # Get common morphology
-        common_morphology = clinical_data['diagnoses_morphology'].value_counts().index[0]
-        
-        # Get similar cases count
-        similar_cases = len(clinical_data[
-            clinical_data['diagnoses_morphology'] == common_morphology
-        ])
-        
-        return {
-            'stage_distribution': stage_distribution,
-            'common_morphology': common_morphology,
-            'similar_cases': similar_cases
-        }
-    except Exception as e:
-        logger.error(f"Error getting clinical insights: {e}")
-        return {}
+    return _CLINICAL_INSIGHTS
+
+# Analysis prompt is identical for every request; built once at import
+_GEMINI_PROMPT = """
+Analyze this skin lesion image and provide a detailed assessment in JSON format:
+{
+    "classification": "Benign or Malignant",
+    "confidence": "0.0 to 1.0",
+    "characteristics": {
+        "color": "description",
+        "border": "description",
+        "symmetry": "description",
+        "texture": "description"
+    },
+    "reasoning": "detailed explanation",
+    "recommendations": ["list", "of", "recommendations"]
+}
+Focus on ABCDE criteria (Asymmetry, Border, Color, Diameter, Evolution).
+"""
 
 def analyze_with_gemini(image_bytes, mime_type, timeout=15):
     """
@@ -125,55 +230,40 @@ def analyze_with_gemini(image_bytes, mime_type, timeout=15):
         dict: Analysis result or fallback result if timeout
     """
     start_time = time.time()
-    
-    # Define signal handler for timeout
-    def timeout_handler(signum, frame):
-        raise TimeoutError(f"Gemini model analysis timed out after {timeout} seconds")
-    
+
     try:
         if vision_model is None:
             logger.warning("Gemini model not initialized, using fallback")
             return simulate_gemini_response(mime_type)
 
-        # Set timeout alarm
-        signal.signal(signal.SIGALRM, timeout_handler)
-        signal.alarm(timeout)
-
         # Prepare image for Gemini
         image_part = {
             "mime_type": mime_type,
             "data": image_bytes
         }
 
-        # Define the prompt
-        prompt = """
-        Analyze this skin lesion image and provide a detailed assessment in JSON format:
-        {
-            "classification": "Benign or Malignant",
-            "confidence": "0.0 to 1.0",
-            "characteristics": {
-                "color": "description",
-                "border": "description",
-                "symmetry": "description",
-                "texture": "description"
-            },
-            "reasoning": "detailed explanation",
-            "recommendations": ["list", "of", "recommendations"]
-        }
-        Focus on ABCDE criteria (Asymmetry, Border, Color, Diameter, Evolution).
-        """
-
-        # Generate response
-        response = vision_model.generate_content([prompt, image_part])
+        # Generate response with the SDK's request-level timeout, which is
+        # safe under threaded WSGI workers (SIGALRM only fires on the main
+        # thread and breaks under concurrency). The timeout alone only
+        # bounds a single attempt — the client's default Retry has a
+        # 600-second deadline — so a Retry with the same overall deadline
+        # is passed to keep the whole call under `timeout` seconds.
+        # Structured JSON output means the response needs no brace-scanning
+        # extraction and can't wrap the JSON in prose
+        response = vision_model.generate_content(
+            [_GEMINI_PROMPT, image_part],
+            generation_config=genai.types.GenerationConfig(
+                response_mime_type='application/json'
+            ),
+            request_options={
+                'timeout': timeout,
+                'retry': google_retry.Retry(timeout=timeout)
+            }
+        )
         response.resolve()
 
-        # Cancel the alarm
-        signal.alarm(0)
-
         # Parse JSON from response
-        # Find JSON content between curly braces
-        json_str = response.text[response.text.find('{'):response.text.rfind('}')+1]
-        analysis_result = json.loads(json_str)
+        analysis_result = json.loads(response.text)
         
         # Log performance metrics
         end_time = time.time()
@@ -181,24 +271,28 @@ def analyze_with_gemini(image_bytes, mime_type, timeout=15):
         
         return analysis_result
 
-    except TimeoutError as e:
-        # Cancel the alarm to prevent it from firing later
-        signal.alarm(0)
+    except (google_exceptions.DeadlineExceeded,
+            google_exceptions.RetryError, TimeoutError) as e:
         logger.warning(f"Gemini analysis timeout: {str(e)}")
         # Use fallback system
         return simulate_gemini_response(mime_type)
-        
+
     except Exception as e:
-        # Cancel the alarm to prevent it from firing later
-        signal.alarm(0)
         logger.error(f"Error analyzing with Gemini: {str(e)}")
         # Use fallback system
         return simulate_gemini_response(mime_type)
 
+# The home template has no dynamic context, so its rendered body is cached
+# after the first request; in debug mode it re-renders for live editing
+_home_html = None
+
 @app.route('/')
 def home():
     """Render the home page."""
-    return render_template('index.html')
+    global _home_html
+    if _home_html is None or app.debug:
+        _home_html = render_template('index.html')
+    return Response(_home_html, mimetype='text/html')
 
 @app.route('/api/analyze', methods=['POST'])
 def analyze():
@@ -215,19 +309,24 @@ def analyze():
                 'retry_after': 30  # Suggest retrying after 30 seconds
             }), 503  # Service Unavailable
         
+        # Reject oversized uploads from the declared length before reading
+        # a single byte of the body
+        if request.content_length and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+            return jsonify({'error': 'File is too large'}), 413
+
         # Check if image was uploaded
         if 'image' not in request.files:
             return jsonify({'error': 'No image provided'}), 400
-        
+
         file = request.files['image']
-        
+
         # Validate file
         if file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
-        
-        if not allowed_file(file.filename):
+
+        if not allowed_file(file.filename) or file.mimetype not in _ALLOWED_MIMETYPES:
             return jsonify({'error': 'Invalid file type'}), 400
-        
+
         # Read and preprocess image
         image_bytes = file.read()
         
@@ -238,8 +337,23 @@ def analyze():
             logger.warning(f"Invalid image content in file {file.filename}: {str(e)}")
             return jsonify({'error': 'Invalid image content'}), 400
         
+        # Send Gemini a small JPEG re-encoded from the already-resized frame
+        # (kept in OpenCV's native BGR order, so no conversion is needed)
+        # rather than the raw upload; the model downscales large images
+        # anyway, and this cuts upload bytes and drops the big buffer from
+        # the request lifetime
+        ok, jpeg_buf = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        if ok:
+            gemini_bytes, gemini_mime = jpeg_buf.tobytes(), 'image/jpeg'
+        else:
+            gemini_bytes, gemini_mime = image_bytes, file.mimetype
+
+        # Release the raw upload before the slow Gemini round-trip so up to
+        # 16MB per concurrent request isn't pinned for its whole duration
+        del image_bytes
+
         # Get AI analysis
-        analysis_result = analyze_with_gemini(image_bytes, file.mimetype)
+        analysis_result = analyze_with_gemini(gemini_bytes, gemini_mime)
         
         # Check if we got a fallback result
         using_fallback = 'is_fallback' in analysis_result and analysis_result['is_fallback']
@@ -255,7 +369,7 @@ def analyze():
             'reasoning': analysis_result['reasoning'],
             'recommendations': analysis_result['recommendations'],
             'clinical_insights': clinical_insights,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _now(_UTC).isoformat(timespec='seconds'),
             'using_fallback': using_fallback  # Let the frontend know if we used the fallback
         }
         
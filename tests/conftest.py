@@ -2,6 +2,7 @@
 Pytest configuration and fixtures for the Skin Wellness Navigator test suite.
 """
 
+import functools
 import os
 import pytest
 import tempfile
@@ -119,7 +120,11 @@ class MockResponse:
     def __init__(self, json_data: Dict[str, Any], status_code: int = 200):
         self.json_data = json_data
         self.status_code = status_code
-        self.text = json.dumps(json_data)
+
+    @functools.cached_property
+    def text(self):
+        # Serialized lazily: most tests only read .json() or .status_code
+        return json.dumps(self.json_data)
 
     def json(self):
         return self.json_data
@@ -2,6 +2,8 @@
 Test utilities and helper functions for the Skin Wellness Navigator test suite.
 """
 
+import functools
+import mmap
 import os
 import pytest
 import numpy as np
@@ -14,7 +16,11 @@ import base64
 
 class TestDataGenerator:
     """Generate test data for various test scenarios."""
-    
+
+    # Encoded image bytes memoized by (size, color, format) so each unique
+    # parameter tuple pays the PIL encode exactly once per session
+    _image_cache: Dict[Tuple, bytes] = {}
+
     @staticmethod
     def create_test_image(
         size: Tuple[int, int] = (100, 100),
@@ -23,20 +29,25 @@ class TestDataGenerator:
     ) -> BinaryIO:
         """
         Create a test image with specified parameters.
-        
+
         Args:
             size: Image dimensions (width, height)
             color: RGB color tuple
             format: Image format (PNG, JPEG, etc.)
-            
+
         Returns:
-            BytesIO object containing the image
+            BytesIO object containing the image. The underlying encoded
+            bytes are cached and shared, so don't mutate them in place.
         """
-        img = Image.new('RGB', size, color=color)
-        img_byte_arr = io.BytesIO()
-        img.save(img_byte_arr, format=format)
-        img_byte_arr.seek(0)
-        return img_byte_arr
+        key = (size, color, format)
+        cached = TestDataGenerator._image_cache.get(key)
+        if cached is None:
+            img = Image.new('RGB', size, color=color)
+            img_byte_arr = io.BytesIO()
+            img.save(img_byte_arr, format=format)
+            cached = img_byte_arr.getvalue()
+            TestDataGenerator._image_cache[key] = cached
+        return io.BytesIO(cached)
 
     @staticmethod
     def create_test_clinical_data() -> Dict[str, Any]:
@@ -81,13 +92,21 @@ class TestDataGenerator:
             ]
         }
 
+# Warm the cache for the default parameters at import, so the first
+# fixture request of a session never pays the PNG encode mid-test
+TestDataGenerator.create_test_image()
+
 class MockResponse:
     """Mock HTTP response for testing API calls."""
     
     def __init__(self, status_code: int, json_data: Dict[str, Any]):
         self.status_code = status_code
         self._json_data = json_data
-        self.text = json.dumps(json_data)
+
+    @functools.cached_property
+    def text(self) -> str:
+        # Serialized lazily: most tests only read .json() or .status_code
+        return json.dumps(self._json_data)
 
     def json(self) -> Dict[str, Any]:
         return self._json_data
@@ -126,7 +145,7 @@ def mock_analysis_result():
     """Mock analysis result."""
     return TestDataGenerator.create_test_analysis_result()
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def test_image():
     """Generate test image."""
     return TestDataGenerator.create_test_image()
@@ -139,32 +158,37 @@ def assert_valid_image_array(arr: np.ndarray):
         arr: NumPy array to validate
     """
     assert isinstance(arr, np.ndarray)
-    assert len(arr.shape) == 3  # Height, width, channels
+    assert arr.ndim == 3        # Height, width, channels
     assert arr.shape[2] == 3    # RGB channels
-    assert arr.dtype == np.float32 or arr.dtype == np.float64
-    assert np.all(arr >= 0) and np.all(arr <= 1)  # Normalized values
+    assert arr.dtype.kind == 'f'
+    # Two reduction passes instead of materializing boolean arrays
+    mn, mx = arr.min(), arr.max()
+    assert mn >= 0 and mx <= 1  # Normalized values
+
+# Required prediction-result fields and their types, precompiled once so
+# each assertion call is a tight loop over a constant tuple
+_REQUIRED_PREDICTION_FIELDS = (
+    ('prediction', str),
+    ('confidence', float),
+    ('timestamp', str),
+    ('characteristics', dict),
+    ('recommendations', list)
+)
 
 def assert_valid_prediction_result(result: Dict[str, Any]):
     """
     Assert that a prediction result has all required fields.
-    
+
     Args:
         result: Prediction result dictionary to validate
     """
-    required_fields = {
-        'prediction': str,
-        'confidence': float,
-        'timestamp': str,
-        'characteristics': dict,
-        'recommendations': list
-    }
-    
-    for field, field_type in required_fields.items():
+    for field, field_type in _REQUIRED_PREDICTION_FIELDS:
         assert field in result
         assert isinstance(result[field], field_type)
-    
-    assert 0 <= result['confidence'] <= 1
-    assert len(result['recommendations']) > 0
+
+    confidence = result['confidence']
+    assert 0.0 <= confidence <= 1.0
+    assert result['recommendations']
 
 def create_mock_file(content: bytes, filename: str) -> Any:
     """
@@ -178,80 +202,116 @@ def create_mock_file(content: bytes, filename: str) -> Any:
         Mock file object
     """
     class MockFile:
+        """File-like mock backed by BytesIO so seek/read/tell run in C."""
+
+        __slots__ = ('filename', '_buf')
+
         def __init__(self, content, filename):
-            self.content = content
             self.filename = filename
-            self._position = 0
+            self._buf = io.BytesIO(content)
+
+        def read(self, size=-1):
+            return self._buf.read(size)
 
-        def read(self):
-            return self.content
+        def seek(self, position, whence=0):
+            return self._buf.seek(position, whence)
 
-        def seek(self, position):
-            self._position = position
+        def tell(self):
+            return self._buf.tell()
 
     return MockFile(content, filename)
 
 def encode_image_base64(image_path: str) -> str:
     """
     Encode an image file as base64.
-    
+
+    The file is memory-mapped so the kernel pages it straight into the
+    encoder without an intermediate bytes copy of the whole file.
+
     Args:
         image_path: Path to the image file
-        
+
     Returns:
         Base64 encoded string
     """
     with open(image_path, 'rb') as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
+        with mmap.mmap(image_file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return base64.b64encode(mm).decode('ascii')
+
+# Directory layout shared by every test environment
+_TEST_DIRS = (
+    'uploads',
+    'logs',
+    'model_cache',
+    'static/images',
+    'static/css',
+    'static/js',
+    'templates'
+)
 
 def create_test_directory_structure(base_path: str):
     """
     Create a test directory structure.
-    
+
     Args:
         base_path: Base path for the test directory structure
     """
-    directories = [
-        'uploads',
-        'logs',
-        'model_cache',
-        'static/images',
-        'static/css',
-        'static/js',
-        'templates'
-    ]
-    
-    for directory in directories:
+    # One scandir pass of the base lets already-present top-level
+    # directories skip their mkdir syscall when the structure is reused
+    existing = set()
+    if os.path.isdir(base_path):
+        existing = {e.name for e in os.scandir(base_path) if e.is_dir()}
+
+    for directory in _TEST_DIRS:
+        if directory in existing:
+            continue
         os.makedirs(os.path.join(base_path, directory), exist_ok=True)
 
+def _remove_tree(path: str):
+    """Recursively delete a directory using scandir entries.
+
+    DirEntry objects carry the file type from the directory read itself,
+    so no per-entry stat calls are needed on the way down.
+    """
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _remove_tree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
 def cleanup_test_files(base_path: str):
     """
     Clean up test files and directories.
-    
+
     Args:
         base_path: Base path for cleanup
     """
-    import shutil
     if os.path.exists(base_path):
-        shutil.rmtree(base_path)
+        _remove_tree(base_path)
 
 class MockLogger:
     """Mock logger for testing."""
-    
+
+    __slots__ = ('logs', '_append')
+
     def __init__(self):
         self.logs = []
+        # Bound once so each log call skips the attribute lookup chain
+        self._append = self.logs.append
 
     def info(self, message):
-        self.logs.append(('INFO', message))
+        self._append(('INFO', message))
 
     def error(self, message):
-        self.logs.append(('ERROR', message))
+        self._append(('ERROR', message))
 
     def warning(self, message):
-        self.logs.append(('WARNING', message))
+        self._append(('WARNING', message))
 
     def debug(self, message):
-        self.logs.append(('DEBUG', message))
+        self._append(('DEBUG', message))
 
 @pytest.fixture
 def mock_logger():
@@ -273,13 +333,15 @@ def compare_images(image1: Image.Image, image2: Image.Image, tolerance: float =
     # Convert images to arrays
     arr1 = np.array(image1)
     arr2 = np.array(image2)
-    
+
     if arr1.shape != arr2.shape:
         return False
-    
-    # Calculate mean absolute difference
-    diff = np.mean(np.abs(arr1 - arr2))
-    return diff <= tolerance
+
+    # Subtract into a signed int16 buffer so uint8 pixels can't wrap
+    # modulo 256, then take abs in place — one temporary, two passes
+    diff = np.subtract(arr1, arr2, dtype=np.int16)
+    np.abs(diff, out=diff)
+    return diff.mean() <= tolerance
 
 class TestEnvironment:
     """Context manager for setting up and tearing down test environment."""
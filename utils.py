@@ -5,14 +5,63 @@ from PIL import Image
 import io
 from datetime import datetime
 import pandas as pd
+import psutil
 from typing import Dict, List, Tuple, Optional, Union
 import logging
 from logging_config import log_data_processing, log_performance_metrics, log_error
+import threading
 import time
 import random
 
+# orjson serializes several times faster than the stdlib encoder; fall
+# back to json when it isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Timestamp string memoized to one-second granularity: results don't need
+# sub-second resolution, so high-frequency callers share one formatted
+# string per second instead of paying datetime.now().isoformat() each time
+_last_ts = 0
+_last_str = ''
+
+def _now_iso() -> str:
+    """Return the current local time in ISO format, cached per second."""
+    global _last_ts, _last_str
+    it = int(time.time())
+    if it != _last_ts:
+        _last_ts = it
+        _last_str = datetime.fromtimestamp(it).isoformat()
+    return _last_str
+
+# Canonical fallback characteristics and reasoning, built once at import
+# instead of on every simulated response
+_BENIGN_CHARACTERISTICS = {
+    'color': 'Uniform tan to brown coloration',
+    'border': 'Well-defined, smooth borders',
+    'symmetry': 'Mostly symmetrical',
+    'texture': 'Smooth, consistent texture'
+}
+_BENIGN_REASONING = (
+    "The lesion shows uniform coloration without significant variation. "
+    "The borders are well-defined and regular. The overall shape is symmetrical. "
+    "These characteristics are typically associated with benign skin lesions."
+)
+_MALIGNANT_CHARACTERISTICS = {
+    'color': 'Varied coloration with dark and uneven areas',
+    'border': 'Irregular, poorly defined edges',
+    'symmetry': 'Asymmetrical shape',
+    'texture': 'Uneven texture with raised areas'
+}
+_MALIGNANT_REASONING = (
+    "The lesion shows concerning features including color variation, "
+    "irregular borders, and asymmetrical shape. These features are "
+    "common in malignant skin lesions and warrant further examination."
+)
+
 def simulate_gemini_response(image_mime_type: str = None) -> Dict:
     """
     Generate a simulated response when Gemini model is unavailable or times out.
@@ -28,41 +77,22 @@ def simulate_gemini_response(image_mime_type: str = None) -> Dict:
         # Log that we're using the fallback
         logger.warning("Using fallback simulation for Gemini model response")
         
-        # Randomly choose classification (with higher probability for benign)
-        classification = random.choices(
-            ['Benign', 'Malignant'], 
-            weights=[0.7, 0.3], 
-            k=1
-        )[0]
-        
+        # Randomly choose classification (with higher probability for
+        # benign); a direct Bernoulli draw replaces random.choices, which
+        # builds cumulative weights and bisects for a single two-way pick
+        classification = 'Benign' if random.random() < 0.7 else 'Malignant'
+
         # Generate a confidence score
         confidence = random.uniform(0.65, 0.92)
-        
-        # Define characteristics based on classification
+
+        # Pick characteristics based on classification; copied so callers
+        # can mutate the result without touching the shared constants
         if classification == 'Benign':
-            characteristics = {
-                'color': 'Uniform tan to brown coloration',
-                'border': 'Well-defined, smooth borders',
-                'symmetry': 'Mostly symmetrical',
-                'texture': 'Smooth, consistent texture'
-            }
-            reasoning = (
-                "The lesion shows uniform coloration without significant variation. "
-                "The borders are well-defined and regular. The overall shape is symmetrical. "
-                "These characteristics are typically associated with benign skin lesions."
-            )
+            characteristics = dict(_BENIGN_CHARACTERISTICS)
+            reasoning = _BENIGN_REASONING
         else:
-            characteristics = {
-                'color': 'Varied coloration with dark and uneven areas',
-                'border': 'Irregular, poorly defined edges',
-                'symmetry': 'Asymmetrical shape',
-                'texture': 'Uneven texture with raised areas'
-            }
-            reasoning = (
-                "The lesion shows concerning features including color variation, "
-                "irregular borders, and asymmetrical shape. These features are "
-                "common in malignant skin lesions and warrant further examination."
-            )
+            characteristics = dict(_MALIGNANT_CHARACTERISTICS)
+            reasoning = _MALIGNANT_REASONING
         
         # Generate recommendations
         recommendations = ResultsFormatter.get_recommendations(classification, confidence)
@@ -103,33 +133,39 @@ def simulate_gemini_response(image_mime_type: str = None) -> Dict:
 
 logger = logging.getLogger(__name__)
 
+# Allowed upload extensions, as a tuple so str.endswith checks them in one
+# C-level call without rebuilding the collection per validation
+_ALLOWED_EXT = ('.png', '.jpg', '.jpeg')
+
 class ImageProcessor:
     """Handle image processing operations."""
-    
+
     @staticmethod
     def validate_image(file) -> bool:
         """
         Validate image file format and size.
-        
+
         Args:
             file: File object from request
-            
+
         Returns:
             bool: True if valid, False otherwise
         """
         try:
-            # Check file extension
-            allowed_extensions = {'png', 'jpg', 'jpeg'}
-            if not file.filename.lower().endswith(tuple(allowed_extensions)):
+            # Check file extension before any I/O
+            if not file.filename.lower().endswith(_ALLOWED_EXT):
                 logger.warning(f"Invalid file extension: {file.filename}")
                 return False
-            
-            # Check file size (max 16MB)
-            if len(file.read()) > 16 * 1024 * 1024:
+
+            # Check file size (max 16MB) by seeking, without reading the
+            # upload into memory just to measure it
+            file.seek(0, os.SEEK_END)
+            size = file.tell()
+            file.seek(0)  # Reset file pointer
+            if size > 16 * 1024 * 1024:
                 logger.warning(f"File too large: {file.filename}")
                 return False
-                
-            file.seek(0)  # Reset file pointer
+
             return True
         except Exception as e:
             logger.error(f"Error validating image: {str(e)}")
@@ -158,9 +194,11 @@ class ImageProcessor:
             
             # Resize
             image = image.resize(target_size)
-            
-            # Convert to array and normalize
-            img_array = np.array(image) / 255.0
+
+            # Convert to float32 and normalize in place; dividing the uint8
+            # array by 255.0 would promote to float64 and double the bytes
+            img_array = np.asarray(image, dtype=np.float32)
+            img_array *= np.float32(1.0 / 255.0)
             
             log_data_processing(
                 logger,
@@ -178,9 +216,20 @@ class ImageProcessor:
             logger.error(f"Error preprocessing image: {str(e)}")
             raise
 
+# Low-cardinality clinical columns read as pandas categoricals: codes are
+# stored as small ints instead of per-row Python strings, and value_counts
+# over them is a histogram of the code array
+_CATEGORICAL_COLUMNS = {
+    'demographic_gender': 'category',
+    'diagnoses_ajcc_pathologic_stage': 'category',
+    'diagnoses_morphology': 'category',
+    'treatments_treatment_type': 'category',
+    'treatments_treatment_outcome': 'category'
+}
+
 class ClinicalDataProcessor:
     """Handle clinical data operations."""
-    
+
     def __init__(self, data_path: str):
         """
         Initialize with path to clinical data.
@@ -193,9 +242,23 @@ class ClinicalDataProcessor:
         self.load_data()
 
     def load_data(self) -> None:
-        """Load clinical data from CSV file."""
+        """Load clinical data from CSV file and precompute its statistics."""
         try:
-            self.data = pd.read_csv(self.data_path)
+            self.data = pd.read_csv(self.data_path, dtype=_CATEGORICAL_COLUMNS)
+
+            # The dataframe is read-only after load, so every aggregate
+            # except the per-condition case count is a constant; compute
+            # them once here instead of on each get_statistics call
+            ages = self.data['demographic_age_at_index']
+            self._stage_dist = self.data['diagnoses_ajcc_pathologic_stage'].value_counts().to_dict()
+            self._age_stats = {
+                'mean': float(ages.mean()),
+                'median': float(ages.median()),
+                'std': float(ages.std())
+            }
+            self._gender_dist = self.data['demographic_gender'].value_counts().to_dict()
+            self._morph_counts = self.data['diagnoses_morphology'].value_counts().to_dict()
+
             logger.info(f"Clinical data loaded successfully from {self.data_path}")
         except Exception as e:
             logger.error(f"Error loading clinical data: {str(e)}")
@@ -204,29 +267,40 @@ class ClinicalDataProcessor:
     def get_statistics(self, condition: str) -> Dict:
         """
         Get statistical information for a specific condition.
-        
+
         Args:
             condition: Type of condition to analyze
-            
+
         Returns:
             Dict: Statistical information
         """
         try:
             stats = {
-                'stage_distribution': self.data['diagnoses_ajcc_pathologic_stage'].value_counts().to_dict(),
-                'age_distribution': {
-                    'mean': float(self.data['demographic_age_at_index'].mean()),
-                    'median': float(self.data['demographic_age_at_index'].median()),
-                    'std': float(self.data['demographic_age_at_index'].std())
-                },
-                'gender_distribution': self.data['demographic_gender'].value_counts().to_dict(),
-                'similar_cases': len(self.data[self.data['diagnoses_morphology'] == condition])
+                'stage_distribution': self._stage_dist,
+                'age_distribution': self._age_stats,
+                'gender_distribution': self._gender_dist,
+                'similar_cases': self._morph_counts.get(condition, 0)
             }
             return stats
         except Exception as e:
             logger.error(f"Error calculating statistics: {str(e)}")
             raise
 
+# Canonical recommendation lists as immutable module-level tuples; the
+# formatter copies into a fresh list per call instead of rebuilding them
+_MALIGNANT_RECS = (
+    "Seek immediate medical attention",
+    "Schedule an appointment with a dermatologist",
+    "Document any changes in the lesion",
+    "Avoid sun exposure to the affected area"
+)
+_BENIGN_RECS = (
+    "Continue regular skin checks",
+    "Use sun protection",
+    "Monitor for any changes",
+    "Schedule routine dermatologist visits"
+)
+
 class ResultsFormatter:
     """Format and validate analysis results."""
     
@@ -253,7 +327,7 @@ class ResultsFormatter:
             return {
                 'prediction': prediction,
                 'confidence': float(confidence),
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': _now_iso(),
                 'clinical_statistics': clinical_stats,
                 'characteristics': characteristics,
                 'recommendations': ResultsFormatter.get_recommendations(prediction, confidence)
@@ -274,47 +348,85 @@ class ResultsFormatter:
         Returns:
             List[str]: List of recommendations
         """
-        recommendations = []
-        
-        if prediction.lower() == 'malignant':
-            recommendations.extend([
-                "Seek immediate medical attention",
-                "Schedule an appointment with a dermatologist",
-                "Document any changes in the lesion",
-                "Avoid sun exposure to the affected area"
-            ])
-        else:
-            recommendations.extend([
-                "Continue regular skin checks",
-                "Use sun protection",
-                "Monitor for any changes",
-                "Schedule routine dermatologist visits"
-            ])
-            
+        recommendations = list(
+            _MALIGNANT_RECS if prediction.lower() == 'malignant' else _BENIGN_RECS
+        )
+
         if confidence < 0.8:
             recommendations.append("Consider getting a second opinion due to uncertainty in the analysis")
-            
+
         return recommendations
 
+# Mount point sampled for disk usage
+_DISK_PATH = '/'
+
 class SystemMonitor:
     """Monitor system health and performance."""
-    
+
+    # Metrics are refreshed by a background daemon thread so per-request
+    # health checks read a cached snapshot instead of hitting /proc
+    _SAMPLE_INTERVAL = 2.0
+    _lock = threading.Lock()
+    _latest_metrics: Optional[Dict] = None
+    _sampler_started = False
+
     @staticmethod
-    def get_system_metrics() -> Dict:
+    def _read_metrics() -> Dict:
         """
-        Get current system metrics.
-        
-        Returns:
-            Dict: System metrics
+        Take a fresh metrics sample.
+
+        cpu_percent(interval=None) is non-blocking and measures since the
+        previous call; _ensure_sampler resets that baseline before the
+        first cached snapshot so every reading covers a real interval.
         """
-        import psutil
-        
         return {
-            'cpu_usage': psutil.cpu_percent(),
+            'cpu_usage': psutil.cpu_percent(interval=None),
             'memory_usage': psutil.virtual_memory().percent,
-            'disk_usage': psutil.disk_usage('/').percent
+            'disk_usage': psutil.disk_usage(_DISK_PATH).percent
         }
 
+    @classmethod
+    def _sampler(cls):
+        """Refresh the cached metrics every sample interval."""
+        while True:
+            time.sleep(cls._SAMPLE_INTERVAL)
+            metrics = cls._read_metrics()
+            with cls._lock:
+                cls._latest_metrics = metrics
+
+    @classmethod
+    def _ensure_sampler(cls):
+        """Start the background sampler thread on first use."""
+        if cls._sampler_started:
+            return
+        with cls._lock:
+            if cls._sampler_started:
+                return
+            # Discard psutil's first CPU reading: it measures since the
+            # module import, i.e. over process startup, and would pin a
+            # saturated value in the cache for a whole sample interval.
+            # Until the sampler's first real reading lands, report 0.0 —
+            # the same value psutil documents for an unprimed call.
+            psutil.cpu_percent(interval=None)
+            metrics = cls._read_metrics()
+            metrics['cpu_usage'] = 0.0
+            cls._latest_metrics = metrics
+            threading.Thread(target=cls._sampler, daemon=True).start()
+            cls._sampler_started = True
+
+    @staticmethod
+    def get_system_metrics() -> Dict:
+        """
+        Get current system metrics.
+
+        Returns:
+            Dict: System metrics (cached snapshot, at most a couple of
+            seconds old)
+        """
+        SystemMonitor._ensure_sampler()
+        with SystemMonitor._lock:
+            return SystemMonitor._latest_metrics
+
     @staticmethod
     def check_system_health() -> Tuple[bool, str]:
         """
@@ -334,37 +446,48 @@ class SystemMonitor:
             
         return True, "System healthy"
 
+# History retention: entries kept after compaction, which runs once the
+# file holds twice this many lines
+_HISTORY_MAX_ENTRIES = 100
+
+def _compact_history(history_file: str) -> None:
+    """Trim the history file to the most recent entries when it has grown."""
+    with open(history_file, 'r') as f:
+        lines = f.readlines()
+
+    if len(lines) > 2 * _HISTORY_MAX_ENTRIES:
+        with open(history_file, 'w') as f:
+            f.writelines(lines[-_HISTORY_MAX_ENTRIES:])
+
 def save_to_history(result: Dict, history_file: str = 'analysis_history.json') -> None:
     """
     Save analysis result to history.
-    
+
+    The history is stored as JSON Lines — one entry per line — so each
+    save is a single append instead of a full-file rewrite; the file is
+    compacted back to the last 100 entries once it doubles.
+
     Args:
         result: Analysis result
         history_file: Path to history file
     """
     try:
-        # Load existing history
-        if os.path.exists(history_file):
-            with open(history_file, 'r') as f:
-                history = json.load(f)
-        else:
-            history = []
-            
-        # Add new result
-        history.append({
-            'timestamp': datetime.now().isoformat(),
+        payload = {
+            'timestamp': _now_iso(),
             'result': result
-        })
-        
-        # Keep only last 100 entries
-        history = history[-100:]
-        
-        # Save updated history
-        with open(history_file, 'w') as f:
-            json.dump(history, f, indent=2)
-            
+        }
+        if orjson is not None:
+            entry = orjson.dumps(payload)
+        else:
+            entry = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+        with open(history_file, 'ab') as f:
+            f.write(entry + b'\n')
+
+        _compact_history(history_file)
+
         logger.info(f"Analysis result saved to history: {history_file}")
-        
+
     except Exception as e:
         logger.error(f"Error saving to history: {str(e)}")
         raise